@@ -1,5 +1,11 @@
+import heapq
 import time
-from typing import Any, Dict, Tuple, Optional
+from collections import OrderedDict
+from typing import Any, List, Tuple, Optional
+
+# Monotonic so TTLs survive wall-clock jumps (NTP); bound at module scope
+# to skip the global + attribute lookup on each call.
+_now = time.monotonic
 
 
 class TTLCache:
@@ -11,27 +17,49 @@ class TTLCache:
     def __init__(self, ttl_seconds: float = 60.0, maxsize: int = 256):
         self.ttl = ttl_seconds
         self.maxsize = maxsize
-        self._store: Dict[Any, Tuple[float, Any]] = {}
+        # Ordered least- to most-recently-used so eviction is O(1).
+        self._store: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        # Min-heap of (expires_at, key) with lazy deletion: entries whose
+        # key is gone or has been re-set with a newer expiry are skipped.
+        self._heap: List[Tuple[float, Any]] = []
+
+    def _purge_expired(self, now: float) -> None:
+        """Drop expired entries in O(k log n) for k expirations."""
+        heap = self._heap
+        store = self._store
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            current = store.get(key)
+            if current and current[0] == expires_at:
+                store.pop(key, None)
 
     def get(self, key: Any) -> Optional[Any]:
-        now = time.time()
-        item = self._store.get(key)
+        now = _now()
+        self._purge_expired(now)
+        store = self._store
+        item = store.get(key)
         if not item:
             return None
         expires_at, value = item
         if now > expires_at:
             # expired
-            self._store.pop(key, None)
+            store.pop(key, None)
             return None
+        store.move_to_end(key)
         return value
 
     def set(self, key: Any, value: Any) -> None:
-        # Simple eviction if over size: drop oldest by expiry soonest
-        if len(self._store) >= self.maxsize:
-            # remove item with smallest expires_at
-            oldest_key = min(self._store.keys(), key=lambda k: self._store[k][0])
-            self._store.pop(oldest_key, None)
-        self._store[key] = (time.time() + self.ttl, value)
+        now = _now()
+        self._purge_expired(now)
+        store = self._store
+        if key in store:
+            store.move_to_end(key)
+        elif len(store) >= self.maxsize:
+            # drop the least-recently-used entry
+            store.popitem(last=False)
+        expires_at = now + self.ttl
+        store[key] = (expires_at, value)
+        heapq.heappush(self._heap, (expires_at, key))
 
     def size(self) -> int:
         return len(self._store)
@@ -1,54 +1,82 @@
 import os
 import logging
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Optional
+
+# Lazily-created singleton so the httpx connection pool (and its TLS
+# sessions) is reused across requests instead of rebuilt per call.
+_openai_client = None
+_openai_lock = threading.Lock()
+
+# Static prompt text, built once at import instead of per call.
+_SYS_PROMPT = (
+    "You are a helpful shopping assistant. Given a user query and a set of "
+    "relevant LG products, write a concise, helpful recommendation. "
+    "Be practical, cite specific model names, and end with 1-2 tips."
+)
+_SYS_MESSAGE = {"role": "system", "content": _SYS_PROMPT}
+_NO_RESULTS_SUMMARY = (
+    "I couldn't find relevant products for your query. Try rephrasing or relaxing "
+    "your constraints (e.g., broader category or price range)."
+)
+
+
+def get_openai_client() -> Optional[Any]:
+    """Return a shared AsyncOpenAI client, or None when no API key is set.
+
+    Safe to call at startup to pay the construction cost before the
+    first user request.
+    """
+    global _openai_client
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None
+    if _openai_client is None:
+        with _openai_lock:
+            if _openai_client is None:
+                # Lazy import so environments without openai still run
+                from openai import AsyncOpenAI
+
+                _openai_client = AsyncOpenAI(api_key=api_key, timeout=15.0)
+    return _openai_client
+
+
+def _format_price(price: Any) -> str:
+    return f"${price:.2f}" if isinstance(price, (int, float)) else "N/A"
 
 
 def _format_products_for_prompt(products: List[Dict[str, Any]]) -> str:
-    lines = []
-    for i, p in enumerate(products, start=1):
-        cats = ", ".join(p.get("category", []) or [])
-        price = p.get("final_price") or p.get("msrp")
-        price_str = f"${price:.2f}" if isinstance(price, (int, float)) else "N/A"
-        line = (
-            f"{i}. {p.get('name', 'Unknown')} (SKU: {p.get('sku')})\n"
-            f"   Category: {cats}\n"
-            f"   Price: {price_str}\n"
-            f"   URL: {p.get('uri') or 'N/A'}\n"
-            f"   Why relevant: {p.get('description') or 'N/A'}\n"
-        )
-        lines.append(line)
-    return "\n".join(lines)
-
-
-def generate_summary(products: List[Dict[str, Any]], user_query: str) -> str:
+    # Single fused join over a generator: no intermediate list appends.
+    return "\n".join(
+        f"{i}. {p.get('name', 'Unknown')} (SKU: {p.get('sku')})\n"
+        f"   Category: {', '.join(p.get('category') or ())}\n"
+        f"   Price: {_format_price(p.get('final_price') or p.get('msrp'))}\n"
+        f"   URL: {p.get('uri') or 'N/A'}\n"
+        f"   Why relevant: {p.get('description') or 'N/A'}\n"
+        for i, p in enumerate(products, start=1)
+    )
+
+
+async def generate_summary(products: List[Dict[str, Any]], user_query: str) -> str:
     """Generate a natural language summary using OpenAI when available,
     otherwise fall back to a deterministic, template-based response.
     """
-    api_key = os.getenv("OPENAI_API_KEY")
     model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
     context = _format_products_for_prompt(products)
 
-    if api_key:
+    client = get_openai_client()
+    if client is not None:
         try:
-            # Lazy import so environments without openai still run
-            from openai import OpenAI
-
-            client = OpenAI(api_key=api_key)
-            sys_prompt = (
-                "You are a helpful shopping assistant. Given a user query and a set of "
-                "relevant LG products, write a concise, helpful recommendation. "
-                "Be practical, cite specific model names, and end with 1-2 tips."
-            )
             user_msg = (
                 f"User query: {user_query}\n\n"
                 f"Relevant products:\n{context}\n\n"
-                f"Instructions: Summarize top picks, mention trade-offs, and suggest next steps."
+                "Instructions: Summarize top picks, mention trade-offs, and suggest next steps."
             )
-            resp = client.chat.completions.create(
+            resp = await client.chat.completions.create(
                 model=model,
                 messages=[
-                    {"role": "system", "content": sys_prompt},
+                    _SYS_MESSAGE,
                     {"role": "user", "content": user_msg},
                 ],
                 temperature=0.3,
@@ -59,19 +87,16 @@ def generate_summary(products: List[Dict[str, Any]], user_query: str) -> str:
 
     # Fallback deterministic summary
     if not products:
-        return (
-            "I couldn't find relevant products for your query. Try rephrasing or relaxing "
-            "your constraints (e.g., broader category or price range)."
-        )
+        return _NO_RESULTS_SUMMARY
 
-    bullets = []
-    for p in products[:3]:
-        price = p.get("final_price") or p.get("msrp")
-        price_str = f"${price:.2f}" if isinstance(price, (int, float)) else "N/A"
-        bullets.append(f"- {p.get('name')} (SKU {p.get('sku')}), around {price_str}")
+    bullets = "\n".join(
+        f"- {p.get('name')} (SKU {p.get('sku')}), "
+        f"around {_format_price(p.get('final_price') or p.get('msrp'))}"
+        for p in products[:3]
+    )
 
     return (
-        f"For '{user_query}', here are solid options:\n" +
-        "\n".join(bullets) +
-        "\nTip: Compare panel/size vs. budget, and check stock before ordering."
+        f"For '{user_query}', here are solid options:\n"
+        f"{bullets}\n"
+        "Tip: Compare panel/size vs. budget, and check stock before ordering."
     )
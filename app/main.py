@@ -1,16 +1,17 @@
 import os
 import time
+import asyncio
 import logging
-from typing import Tuple
+from typing import Dict, Tuple
 
 from fastapi import FastAPI, HTTPException, Request, Depends
 from fastapi.responses import JSONResponse
 
-from .schemas import SearchRequest, SearchResponse, Product, SearchMetadata
-from .retriever import ProductRetriever, DEFAULT_DATASET_PATH, DEFAULT_CHROMA_DIR
+from .schemas import SearchRequest, SearchResponse, SearchMetadata
+from .retriever import ProductRetriever, DEFAULT_DATASET_PATH, DEFAULT_INDEX_DIR
 from .cache import TTLCache
 from .rate_limiter import RateLimiter
-from .llm import generate_summary
+from .llm import generate_summary, get_openai_client
 
 
 def setup_logging():
@@ -26,16 +27,32 @@ app = FastAPI(title="Semantic Product Search API", version="1.0.0")
 
 
 # Globals (simple in-memory for this exercise)
-retriever = ProductRetriever(dataset_path=DEFAULT_DATASET_PATH, persist_dir=DEFAULT_CHROMA_DIR)
+retriever = ProductRetriever(dataset_path=DEFAULT_DATASET_PATH, persist_dir=DEFAULT_INDEX_DIR)
 cache = TTLCache(ttl_seconds=float(os.getenv("CACHE_TTL", "60")))
 rate_limiter = RateLimiter(max_requests=int(os.getenv("RATE_LIMIT", "60")), window_seconds=60)
+# Single-flight map: concurrent misses on the same key await one future
+# instead of each running the full embed + search + summarize pipeline.
+_inflight: Dict[Tuple, "asyncio.Future"] = {}
+
+
+async def _rate_limiter_sweeper():
+    while True:
+        await asyncio.sleep(rate_limiter.window)
+        rate_limiter.sweep()
 
 
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     # Ensure we have an index. This may take ~seconds on first run.
     total = retriever.ensure_index(force_rebuild=False)
     logging.info("Vector index ready with %d items", total)
+    # Batch concurrent query encodes into shared forward passes.
+    retriever.start_embed_batcher()
+    # Periodically drop rate-limiter entries for idle clients.
+    asyncio.create_task(_rate_limiter_sweeper())
+    # Construct the shared OpenAI client (and its connection pool) now so
+    # the first cache miss doesn't pay the init cost.
+    get_openai_client()
 
 
 @app.middleware("http")
@@ -48,7 +65,10 @@ async def log_requests(request: Request, call_next):
 
 
 def enforce_rate_limit(request: Request):
-    client = request.client.host if request.client else "unknown"
+    # Read the (host, port) pair straight out of the ASGI scope instead of
+    # going through Starlette's request.client property chain.
+    client_tuple = request.scope.get("client")
+    client = client_tuple[0] if client_tuple else "unknown"
     if not rate_limiter.allow(client):
         raise HTTPException(status_code=429, detail="Rate limit exceeded. Please try again later.")
 
@@ -58,9 +78,10 @@ def root():
     return {"status": "ok", "items_indexed": retriever.count()}
 
 
-@app.post("/search", response_model=SearchResponse)
-def search(req: SearchRequest, request: Request, _=Depends(enforce_rate_limit)):
-    key = (req.query.strip().lower(), req.max_results)
+@app.post("/search", response_model=None)
+async def search(req: SearchRequest, request: Request, _=Depends(enforce_rate_limit)) -> SearchResponse:
+    # query is already stripped and lowercased by the request validator
+    key = (req.query, req.max_results)
     cached = cache.get(key)
     start = time.time()
     cache_hit = False
@@ -69,35 +90,43 @@ def search(req: SearchRequest, request: Request, _=Depends(enforce_rate_limit)):
         products = cached["products"]
         summary = cached["summary"]
         cache_hit = True
+    elif (fut := _inflight.get(key)) is not None:
+        # Another request is already computing this key; piggyback on it.
+        result = await fut
+        products = result["products"]
+        summary = result["summary"]
     else:
-        products_raw = retriever.search(req.query, k=req.max_results)
-        products = [
-            Product(
-                sku=p.get("sku"),
-                name=p.get("name"),
-                category=p.get("category", []) or [],
-                uri=p.get("uri"),
-                msrp=p.get("msrp"),
-                final_price=p.get("final_price"),
-                release_date=p.get("release_date"),
-                in_stock=p.get("in_stock"),
-                description=p.get("description"),
-                score=p.get("score"),
-            ).dict()
-            for p in products_raw
-        ]
-        summary = generate_summary(products, req.query)
-        cache.set(key, {"products": products, "summary": summary})
+        fut = asyncio.get_running_loop().create_future()
+        _inflight[key] = fut
+        try:
+            # The retriever already returns dicts in the Product shape;
+            # building Product models here just to .dict() them would make
+            # FastAPI validate the same data twice.
+            # Embedding goes through the micro-batcher so concurrent
+            # queries share one forward pass; the graph search is blocking
+            # and stays off the event loop.
+            emb = await retriever.embed_query_async(req.query)
+            products = await asyncio.to_thread(retriever.search_by_embedding, emb, req.max_results)
+            summary = await generate_summary(products, req.query)
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()  # mark retrieved in case nobody was waiting
+            raise
+        finally:
+            _inflight.pop(key, None)
+        result = {"products": products, "summary": summary}
+        cache.set(key, result)
+        fut.set_result(result)
 
     duration_ms = (time.time() - start) * 1000.0
-    metadata = SearchMetadata(
+    metadata = SearchMetadata.construct(
         execution_time_ms=round(duration_ms, 2),
         cache_hit=cache_hit,
         total_index_size=retriever.count(),
         k=req.max_results,
         results_count=len(products),
     )
-    return SearchResponse(products=products, summary=summary, metadata=metadata)
+    return SearchResponse.construct(products=products, summary=summary, metadata=metadata)
 
 
 @app.get("/healthz")
@@ -1,27 +1,69 @@
 import time
-from collections import deque
-from typing import Deque, Dict
+import threading
+from array import array
+from typing import Dict, List
+
+# Monotonic so windows survive wall-clock jumps (NTP); bound at module
+# scope to skip the global + attribute lookup on each call.
+_now = time.monotonic
+
+# Once we track this many clients, sweep idle ones on the next allow().
+_GC_SOFT_CAP = 4096
 
 
 class RateLimiter:
     """Very simple in-memory sliding-window rate limiter.
 
-    Not safe for multi-process or distributed deployments, but adequate for this exercise.
+    Each client gets a preallocated ring buffer of its last `max_requests`
+    hit timestamps, so admission is O(1) index math with no per-hit node
+    allocations. Not safe for multi-process or distributed deployments,
+    but adequate for this exercise.
     """
 
     def __init__(self, max_requests: int = 60, window_seconds: int = 60):
         self.max_requests = max_requests
         self.window = window_seconds
-        self._hits: Dict[str, Deque[float]] = {}
+        # key -> [ring, head]; ring[head] is the oldest recorded hit
+        # (0.0 means the slot was never used).
+        self._hits: Dict[str, List] = {}
+        # allow() runs in worker threads while sweep() runs from the event
+        # loop, so mutations of the client map need a lock.
+        self._lock = threading.Lock()
 
     def allow(self, key: str) -> bool:
-        now = time.time()
-        dq = self._hits.setdefault(key, deque())
-        # purge old
+        now = _now()
         cutoff = now - self.window
-        while dq and dq[0] < cutoff:
-            dq.popleft()
-        if len(dq) >= self.max_requests:
-            return False
-        dq.append(now)
-        return True
+        with self._lock:
+            entry = self._hits.get(key)
+            if entry is None:
+                if len(self._hits) > _GC_SOFT_CAP:
+                    self._gc_idle(cutoff)
+                entry = self._hits[key] = [array("d", [0.0] * self.max_requests), 0]
+            ring, head = entry
+            oldest = ring[head]
+            if oldest > cutoff and oldest != 0.0:
+                # The oldest of the last max_requests hits is still inside
+                # the window, i.e. the window is full.
+                return False
+            ring[head] = now
+            entry[1] = (head + 1) % self.max_requests
+            return True
+
+    def sweep(self) -> None:
+        """Drop idle clients; meant to run periodically in the background
+        so the map shrinks even without new-client pressure."""
+        with self._lock:
+            self._gc_idle(_now() - self.window)
+
+    def _gc_idle(self, cutoff: float) -> None:
+        """Drop clients whose most recent hit fell out of the window.
+
+        Caller must hold the lock.
+        """
+        idle = [
+            key
+            for key, (ring, head) in self._hits.items()
+            if ring[head - 1] < cutoff
+        ]
+        for key in idle:
+            del self._hits[key]
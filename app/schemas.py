@@ -7,8 +7,10 @@ class SearchRequest(BaseModel):
     max_results: int = Field(5, ge=1, le=10)
 
     @validator("query")
-    def strip_query(cls, v: str) -> str:
-        s = v.strip()
+    def normalize_query(cls, v: str) -> str:
+        # Normalize once at validation time so the cache key and the
+        # retriever can use the field as-is.
+        s = v.strip().lower()
         if not s:
             raise ValueError("query must not be empty")
         return s
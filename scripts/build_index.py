@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
-"""Build or rebuild the local ChromaDB vector index from the CSV dataset.
+"""Build or rebuild the local FAISS vector index from the CSV dataset.
 
 Usage:
   python scripts/build_index.py [--force]
 
 Environment (optional):
   DATASET_PATH   Path to CSV (default: take_home_dataset.csv)
-  CHROMA_DIR     Persist directory for Chroma (default: ./vectorstore)
+  INDEX_DIR      Persist directory for the index (default: ./vectorstore)
   EMBEDDING_MODEL SentenceTransformer model name (default: all-MiniLM-L6-v2)
 """
 